@@ -0,0 +1,84 @@
+# cython: language_level=3
+"""
+Version compilée (Cython) de generate_mail.encode_html_characters.
+
+Construite avec `python setup.py build_ext --inplace` ; generate_mail.py revient
+automatiquement à la version Python pure si ce module n'est pas disponible.
+"""
+cimport cython
+from libc.stdio cimport snprintf
+from libc.string cimport memcpy
+
+# Accès direct au tampon interne des chaînes Python (API C de CPython)
+cdef extern from "Python.h":
+    object PyUnicode_New(Py_ssize_t size, Py_UCS4 maxchar)
+    Py_ssize_t PyUnicode_GET_LENGTH(object o)
+    int PyUnicode_KIND(object o)
+    void* PyUnicode_DATA(object o)
+    Py_UCS4 PyUnicode_READ(int kind, void* data, Py_ssize_t index)
+
+cdef const char* _BR = b"<br>"
+
+# Calcule la longueur de l'entité "&#NNN;" correspondant à un point de code
+cdef inline Py_ssize_t _entity_length(unsigned int code) noexcept nogil:
+    cdef Py_ssize_t length = 3  # "&#" et ";"
+    while True:
+        length += 1
+        code //= 10
+        if code == 0:
+            return length
+
+# Fonction pour encoder les caractères spéciaux en entités HTML
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def encode_html_characters(str unencoded_str not None):
+    """
+    Converts a string with special characters into an HTML-compatible version.
+
+    Args:
+        unencoded_str (str): The raw text to encode.
+
+    Returns:
+        str: A string encoded with special characters replaced by HTML entities,
+             and newlines replaced with <br>.
+    """
+    cdef Py_ssize_t i, pos = 0, size = 0
+    cdef Py_ssize_t n = PyUnicode_GET_LENGTH(unencoded_str)
+    cdef int kind = PyUnicode_KIND(unencoded_str)
+    cdef void* data = PyUnicode_DATA(unencoded_str)
+    cdef Py_UCS4 c
+    cdef char entity[16]
+    cdef int length
+    cdef str result
+    cdef char* out
+
+    # Cas courant : texte ASCII, seuls les sauts de ligne sont à remplacer (pas de passe de dimensionnement)
+    if unencoded_str.isascii():
+        return unencoded_str.replace("\n", "<br>")
+
+    # Première passe : calcule la taille exacte du résultat
+    for i in range(n):
+        c = PyUnicode_READ(kind, data, i)
+        if c == 0x0A:
+            size += 4
+        elif c < 0x80:
+            size += 1
+        else:
+            size += _entity_length(<unsigned int>c)
+
+    # Seconde passe : écrit directement dans une chaîne ASCII préallouée
+    result = PyUnicode_New(size, 127)
+    out = <char*>PyUnicode_DATA(result)
+    for i in range(n):
+        c = PyUnicode_READ(kind, data, i)
+        if c == 0x0A:  # Saut de ligne → <br>
+            memcpy(out + pos, _BR, 4)
+            pos += 4
+        elif c < 0x80:  # Caractère ASCII recopié tel quel
+            out[pos] = <char>c
+            pos += 1
+        else:  # Caractère non-ASCII → entité XML (par ex. é → &#233;)
+            length = snprintf(entity, sizeof(entity), b"&#%u;", <unsigned int>c)
+            memcpy(out + pos, entity, length)
+            pos += length
+    return result
@@ -0,0 +1,15 @@
+# Compilation de l'extension Cython optionnelle : python setup.py build_ext --inplace
+from setuptools import setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:  # Cython absent : installation du module Python pur, sans extension compilée
+    ext_modules = []
+else:
+    ext_modules = cythonize("_html_encode.pyx")
+
+setup(
+    name="generate_mail",
+    py_modules=["generate_mail"],
+    ext_modules=ext_modules,
+)
@@ -0,0 +1,147 @@
+from datetime import datetime
+import glob
+import os
+import random
+import tempfile
+import unittest
+
+import generate_mail
+from generate_mail import _EMAIL_RE_M, _collect, _timestamp, _validate_batch
+from generate_mail import generate_msg_filename, prepare_recipients, validate_mail_address
+
+
+def _is_valid(validate, value):
+    try:
+        validate(value)
+    except AssertionError:
+        return False
+    return True
+
+
+class ValidateMailAddressTest(unittest.TestCase):
+
+    def test_valid_addresses(self):
+        for address in ["john.doe@example.com", "a@b.co", "x_y%z+t-u@sub.domain-name.org"]:
+            validate_mail_address(address)
+
+    def test_invalid_addresses(self):
+        for address in [
+            "@example.com",  # Partie locale vide
+            "john@example.c",  # Extension d'une seule lettre
+            "john@@example.com",  # Double '@'
+            "jo@hn@example.com",
+            "jöhn@example.com",  # Caractère non-ASCII
+            "john@exämple.com",
+            "john@example.com\n",  # Saut de ligne final (accepté par l'ancien '$')
+            "",
+            "john@.com",  # Domaine vide
+            "john@example.c0m",  # Chiffre dans l'extension
+        ]:
+            with self.assertRaises(AssertionError, msg=repr(address)):
+                validate_mail_address(address)
+
+
+class ValidateBatchTest(unittest.TestCase):
+    # Le lot (_EMAIL_RE_M) et chaque adresse (_EMAIL_RE) sont validés à partir du même motif :
+    # les deux chemins doivent accepter exactement les mêmes adresses
+
+    def test_regex_agrees_with_validate_mail_address(self):
+        rng = random.Random(0)
+        alphabet = "aZ09._%+-@é \n"
+        for _ in range(20000):
+            address = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+            expected = _is_valid(validate_mail_address, address)
+            self.assertEqual(_is_valid(_validate_batch, [address]), expected, repr(address))
+            if "\n" not in address:
+                self.assertEqual(bool(_EMAIL_RE_M.fullmatch(address)), expected, repr(address))
+
+    def test_batch(self):
+        _validate_batch([])
+        _validate_batch(["a@b.co", "john.doe@example.com"])
+        for addresses in [
+            ["a@b.co", "x"],
+            ["a@b.co\n"],  # Saut de ligne final
+            ["a@b.co\nc@d.co", "x"],  # Adresse contenant un saut de ligne
+        ]:
+            with self.assertRaises(AssertionError, msg=repr(addresses)):
+                _validate_batch(addresses)
+
+
+class CollectTest(unittest.TestCase):
+
+    def setUp(self):
+        self.RecipientType = generate_mail.RecipientType
+        self.Recipient = generate_mail.Recipient
+
+    def test_mixed_str_and_recipient(self):
+        prebuilt = prepare_recipients("z@y.com", self.RecipientType.CC)
+        recipients, display = _collect(["a@b.co", prebuilt], self.RecipientType.CC, "cc")
+        self.assertEqual(display, "a@b.co; z@y.com")
+        self.assertEqual([recipient.email_address for recipient in recipients], ["a@b.co", "z@y.com"])
+        self.assertIsNot(recipients[1], prebuilt)  # L'objet fourni est copié
+
+    def test_to_recipient_passed_in_cc(self):
+        prebuilt = prepare_recipients("z@y.com")
+        recipients, display = _collect([prebuilt], self.RecipientType.CC, "cc")
+        self.assertEqual(recipients[0].recipient_type, self.RecipientType.CC)
+        self.assertEqual(prebuilt.recipient_type, self.RecipientType.TO)  # L'objet de l'appelant est inchangé
+        self.assertEqual(display, "z@y.com")
+
+    def test_bad_types(self):
+        with self.assertRaises(TypeError):
+            _collect(3, self.RecipientType.TO, "to")
+        with self.assertRaises(TypeError):
+            _collect([self.Recipient()], self.RecipientType.CC, "cc")  # Pas d'adresse e-mail
+        with self.assertRaises(AssertionError):
+            _collect(["a@b.co", "x"], self.RecipientType.TO, "to")
+
+    def test_empty_cc(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                generate_mail.generate_mail("a@b.co", "", "Subject", "Body")
+                filenames = glob.glob("*.msg")
+                self.assertEqual(len(filenames), 1)
+                message = generate_mail.Message(filenames[0])
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(message.display_to, "a@b.co")
+        self.assertFalse(message.display_cc)
+        self.assertEqual([recipient.recipient_type for recipient in message.recipients], [self.RecipientType.TO])
+
+
+class GenerateMsgFilenameTest(unittest.TestCase):
+
+    def test_timestamp_matches_strftime(self):
+        before = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = _timestamp()
+        after = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.assertIn(timestamp, (before, after))  # Tolère un changement de seconde entre les appels
+
+    def test_single_call_format(self):
+        filename = generate_msg_filename("john.doe@example.com", "Hello")
+        self.assertRegex(filename, r"^\d{8}_\d{6}_john\.doe_Hello\.msg$")
+        self.assertEqual(generate_msg_filename(["a@b.co", "c@d.org"], "Hi", "20240102_030405"),
+                         "20240102_030405_a+others_Hi.msg")
+        self.assertEqual(generate_msg_filename(["a@b.co"], timestamp="20240102_030405"),
+                         "20240102_030405_a_GenericMessage.msg")
+
+    def test_batch_format(self):
+        self.assertEqual(generate_msg_filename("a@b.co", "Hi", "20240102_030405", 7),
+                         "20240102_030405_0007_a_Hi.msg")
+        self.assertEqual(generate_msg_filename("a@b.co", "Hi", "20240102_030405", 0),
+                         "20240102_030405_0000_a_Hi.msg")
+
+    def test_subject_sanitizing(self):
+        for char in ' /\\:*?"<>|\t\n\r':
+            self.assertEqual(generate_msg_filename("a@b.co", f"x{char}y", "20240102_030405"),
+                             "20240102_030405_a_x_y.msg", repr(char))
+        # Le sujet est tronqué à 30 caractères avant le remplacement
+        subject = "a/b" + "c" * 26 + "?tail"
+        self.assertEqual(generate_msg_filename("a@b.co", subject, "20240102_030405"),
+                         "20240102_030405_a_a_b" + "c" * 26 + "_.msg")
+
+
+if __name__ == "__main__":
+    unittest.main()